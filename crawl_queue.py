@@ -0,0 +1,175 @@
+# crawl_queue.py
+# Lease-based work queue for distributed crawls, stored in a single SQLite file.
+#
+# The coordinator publishes one task per movie URL. Workers claim shards of tasks
+# by taking a time-limited lease on them; a worker that crashes simply stops
+# renewing its leases, and once they expire the tasks are claimed by someone else.
+# Results are written back to the same database, where the merge step reads them.
+#
+# The database can live on storage shared between machines. It uses SQLite's
+# default rollback journal (WAL does not work over network filesystems), and lease
+# expiry assumes the machines' clocks are roughly in sync.
+import sqlite3
+import json
+import os
+import time
+from movie_record import MovieRecord, MovieDetails
+
+QUEUE_DB = os.path.join('data', 'crawl_queue.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    movies TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    run_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT,
+    PRIMARY KEY (run_id, position)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (run_id, status);
+"""
+
+
+class CrawlQueue:
+    """Shared crawl queue; each process opens its own CrawlQueue on the same file"""
+
+    def __init__(self, path=QUEUE_DB, timeout=60):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode: write transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can never claim the same task
+        self.conn.execute('BEGIN IMMEDIATE')
+
+    # --- Coordinator ---
+
+    def publish(self, run_id, movies_list):
+        """Store the chart for a run and enqueue one task per movie page"""
+        self._transaction()
+        try:
+            self.conn.execute(
+                'INSERT INTO runs (run_id, created_at, movies) VALUES (?, ?, ?)',
+                (run_id, time.time(), json.dumps([movie.to_dict() for movie in movies_list], ensure_ascii=False))
+            )
+            self.conn.executemany(
+                'INSERT INTO tasks (run_id, position, url) VALUES (?, ?, ?)',
+                [(run_id, i, movie.imdb_url) for i, movie in enumerate(movies_list) if movie.imdb_url]
+            )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def latest_run(self):
+        row = self.conn.execute('SELECT run_id FROM runs ORDER BY created_at DESC LIMIT 1').fetchone()
+        return row[0] if row else None
+
+    # --- Workers ---
+
+    def claim(self, run_id, worker_id, shard_size, lease_seconds, max_attempts):
+        """
+        Lease up to shard_size tasks to a worker, including tasks whose previous
+        lease expired. Returns a list of (position, url).
+        """
+        now = time.time()
+        self._transaction()
+        try:
+            # Tasks that keep killing their workers are given up on rather than retried forever
+            self.conn.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired too many times' "
+                "WHERE run_id = ? AND status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (run_id, now, max_attempts)
+            )
+            rows = self.conn.execute(
+                "SELECT position, url FROM tasks "
+                "WHERE run_id = ? AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                "ORDER BY position LIMIT ?",
+                (run_id, now, shard_size)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE run_id = ? AND position = ?",
+                [(worker_id, now + lease_seconds, run_id, position) for position, _ in rows]
+            )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return rows
+
+    def renew(self, run_id, worker_id, lease_seconds):
+        """Extend the leases a worker still holds (its heartbeat)"""
+        self.conn.execute(
+            "UPDATE tasks SET lease_expires = ? WHERE run_id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + lease_seconds, run_id, worker_id)
+        )
+
+    def complete(self, run_id, position, worker_id, details):
+        """Store a task's result. Ignored if the lease was lost to another worker."""
+        cursor = self.conn.execute(
+            "UPDATE tasks SET status = 'done', result = ?, error = NULL "
+            "WHERE run_id = ? AND position = ? AND worker = ? AND status = 'leased'",
+            (json.dumps(details.to_dict(), ensure_ascii=False), run_id, position, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, run_id, position, worker_id, error, max_attempts):
+        """Return a failed task to the queue, or mark it failed after max_attempts"""
+        self.conn.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_expires = NULL, error = ? "
+            "WHERE run_id = ? AND position = ? AND worker = ? AND status = 'leased'",
+            (max_attempts, str(error), run_id, position, worker_id)
+        )
+
+    def release(self, run_id, worker_id):
+        """Hand back every task a worker still holds, e.g. when it is shutting down"""
+        self.conn.execute(
+            "UPDATE tasks SET status = 'pending', worker = NULL, lease_expires = NULL "
+            "WHERE run_id = ? AND worker = ? AND status = 'leased'",
+            (run_id, worker_id)
+        )
+
+    def counts(self, run_id):
+        """Number of tasks in each status"""
+        rows = self.conn.execute(
+            'SELECT status, COUNT(*) FROM tasks WHERE run_id = ? GROUP BY status', (run_id,)
+        ).fetchall()
+        return {status: count for status, count in rows}
+
+    # --- Merge ---
+
+    def movies(self, run_id):
+        row = self.conn.execute('SELECT movies FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown crawl run: {run_id}")
+        return [MovieRecord(**movie) for movie in json.loads(row[0])]
+
+    def results(self, run_id):
+        """Finished results of a run as a dict of position -> MovieDetails"""
+        rows = self.conn.execute(
+            "SELECT position, result FROM tasks WHERE run_id = ? AND status = 'done'", (run_id,)
+        ).fetchall()
+        return {position: MovieDetails(**json.loads(result)) for position, result in rows}
@@ -4,6 +4,7 @@ import numpy as np
 from datetime import datetime
 import glob
 import os
+from search_index import build_index
 
 def find_latest_csv(directory="data"):
     """Find the latest scraped CSV file"""
@@ -102,6 +103,9 @@ def clean_data():
     output_path = f'data/clean_top_250_{datetime.now().strftime("%Y%m%d_%H%M")}.csv'
     df.to_csv(output_path, index=False)
     print(f"Cleaned data saved to: {output_path}")
+
+    # Update the full-text search index (only changed titles are re-tokenized)
+    build_index(df)
     return output_path
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+# distributed_crawl.py
+# Sharded crawl of the movie pages across several worker processes or machines.
+#
+#   python distributed_crawl.py coordinator          # fetch the chart, publish one task per movie
+#   python distributed_crawl.py worker               # claim shards and crawl them (run as many as you like)
+#   python distributed_crawl.py merge                # assemble data/imdb_top_250_<run>.csv/json
+#   python distributed_crawl.py local --workers 4    # all of the above on this machine
+#
+# Every process opens the same queue database (--queue, data/crawl_queue.db by default);
+# put it on shared storage to spread workers over several machines.
+#
+# Each process archives the pages it fetches in its own part of the run's archive
+# (archive/pages_<run>.<coordinator|worker id>.warc.gz, see page_archive.py), so the run
+# can be re-extracted offline once the parts are collected in one directory.
+from imdb_scraper import top_250_movies_list, fetch_page, extract_movie_data
+from crawl_queue import CrawlQueue, QUEUE_DB
+from page_archive import PageArchive, ARCHIVE_DIR, run_archives
+from movie_record import MovieDetails
+from run_scraper import combine_movie_data, save_results
+from config import URL, HEADERS
+import argparse
+import logging
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+SHARD_SIZE = 10
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 3
+# Seconds to wait before each request, per worker (same politeness delay as run_scraper)
+DELAY = (1, 3)
+
+def run_coordinator(queue, chart_url=URL, archive_dir=ARCHIVE_DIR):
+    """Fetch the chart and publish its movie pages as a new run. Returns the run id."""
+    # Seconds resolution keeps run ids apart from run_scraper's per-minute timestamps,
+    # which share the archive/ and data/ directories
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    # Checked before fetching, so a second chart is never archived under an existing run
+    if queue.latest_run() == run_id or run_archives(os.path.join(archive_dir, f'pages_{run_id}.warc.gz')):
+        logging.error(f"Run {run_id} already exists; wait a second before publishing another run")
+        return None
+
+    with PageArchive(run_id, archive_dir, part='coordinator') as archive:
+        movies_list = top_250_movies_list(chart_url, HEADERS, archive)
+    if not movies_list:
+        logging.error("Failed to extract movies data")
+        return None
+
+    try:
+        queue.publish(run_id, movies_list)
+    except sqlite3.IntegrityError:
+        logging.error(f"Run {run_id} already exists; wait a second before publishing another run")
+        return None
+    logging.info(f"Published run {run_id} with {len(movies_list)} movies")
+    return run_id
+
+def run_worker(queue, run_id, worker_id=None, shard_size=SHARD_SIZE, lease_seconds=LEASE_SECONDS,
+               max_attempts=MAX_ATTEMPTS, delay=DELAY, archive_dir=ARCHIVE_DIR):
+    """Claim and crawl shards until the run has no tasks left. Returns the number crawled."""
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    crawled = 0
+    logging.info(f"Worker {worker_id} joined run {run_id}")
+
+    with PageArchive(run_id, archive_dir, part=worker_id) as archive:
+        try:
+            while True:
+                shard = queue.claim(run_id, worker_id, shard_size, lease_seconds, max_attempts)
+                if not shard:
+                    counts = queue.counts(run_id)
+                    if not counts.get('pending') and not counts.get('leased'):
+                        break
+                    # Other workers still hold leases; wait in case they crash and their tasks come back
+                    time.sleep(min(5, lease_seconds / 4))
+                    continue
+
+                for position, url in shard:
+                    try:
+                        time.sleep(random.uniform(*delay))
+                        response = fetch_page(url, HEADERS, archive)
+                        response.raise_for_status()
+                        details = extract_movie_data(response.text)
+                    except Exception as e:
+                        logging.warning(f"Worker {worker_id} failed {url}: {e}")
+                        queue.fail(run_id, position, worker_id, e, max_attempts)
+                    else:
+                        if queue.complete(run_id, position, worker_id, details):
+                            crawled += 1
+                    # Heartbeat: keep the rest of the shard leased while we work through it
+                    queue.renew(run_id, worker_id, lease_seconds)
+        finally:
+            queue.release(run_id, worker_id)
+
+    logging.info(f"Worker {worker_id} finished after crawling {crawled} movies")
+    return crawled
+
+def run_merge(queue, run_id, allow_partial=False):
+    """Combine the chart and all finished results of a run into a snapshot"""
+    counts = queue.counts(run_id)
+    unfinished = counts.get('pending', 0) + counts.get('leased', 0)
+    if unfinished and not allow_partial:
+        logging.error(f"Run {run_id} still has {unfinished} unfinished tasks (use --partial to merge anyway)")
+        return None
+
+    movies_list = queue.movies(run_id)
+    results = queue.results(run_id)
+    # Movies that failed or were never crawled keep empty details, as in run_scraper
+    details = [results.get(i, MovieDetails()) for i in range(len(movies_list))]
+    combine_movie_data(movies_list, details)
+    json_path, csv_path = save_results(movies_list, run_id)
+
+    logging.info(f"Merged run {run_id}: {counts.get('done', 0)} done, {counts.get('failed', 0)} failed, "
+                 f"{unfinished} unfinished")
+    logging.info(f"Data saved to {json_path} and {csv_path}")
+    return csv_path
+
+def run_local(queue_path, workers, chart_url=URL, worker_args=(), archive_dir=ARCHIVE_DIR):
+    """Run a coordinator, several worker processes and the merge on this machine"""
+    with CrawlQueue(queue_path) as queue:
+        run_id = run_coordinator(queue, chart_url, archive_dir)
+    if run_id is None:
+        return None
+
+    # Workers are separate processes, exactly as they would be on other machines
+    command = [sys.executable, os.path.abspath(__file__), '--queue', queue_path, '--archive-dir', archive_dir,
+               'worker', '--run', run_id, *worker_args]
+    processes = [subprocess.Popen(command) for _ in range(workers)]
+    for process in processes:
+        process.wait()
+
+    with CrawlQueue(queue_path) as queue:
+        return run_merge(queue, run_id)
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed IMDb Top 250 crawl")
+    parser.add_argument('--queue', default=QUEUE_DB, help="path of the shared queue database")
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR, help="where this process archives fetched pages")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    # Options shared by 'worker' and 'local' (which passes them on to its workers)
+    worker_options = argparse.ArgumentParser(add_help=False)
+    worker_options.add_argument('--shard-size', type=int, default=SHARD_SIZE, help="tasks claimed at a time")
+    worker_options.add_argument('--lease-seconds', type=float, default=LEASE_SECONDS, help="lease duration")
+    worker_options.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS, help="attempts before a task fails")
+    worker_options.add_argument('--delay', type=float, nargs=2, default=DELAY, metavar=('MIN', 'MAX'),
+                                help="random wait before each request, in seconds")
+
+    coordinator = commands.add_parser('coordinator', help="publish a new crawl run")
+    coordinator.add_argument('--chart-url', default=URL)
+
+    worker = commands.add_parser('worker', parents=[worker_options], help="crawl tasks of a run")
+    worker.add_argument('--run', help="run id (default: latest run)")
+
+    merge = commands.add_parser('merge', help="assemble the snapshot of a run")
+    merge.add_argument('--run', help="run id (default: latest run)")
+    merge.add_argument('--partial', action='store_true', help="merge even if tasks are unfinished")
+
+    local = commands.add_parser('local', parents=[worker_options], help="coordinator, workers and merge on this machine")
+    local.add_argument('--workers', type=int, default=4, help="number of worker processes")
+    local.add_argument('--chart-url', default=URL)
+
+    args = parser.parse_args()
+
+    os.makedirs('data', exist_ok=True)
+    os.makedirs('logs', exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('logs/scraper.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+    if args.command == 'local':
+        worker_args = ['--shard-size', str(args.shard_size), '--lease-seconds', str(args.lease_seconds),
+                       '--max-attempts', str(args.max_attempts), '--delay', *map(str, args.delay)]
+        result = run_local(args.queue, args.workers, args.chart_url, worker_args, args.archive_dir)
+        sys.exit(0 if result else 1)
+
+    with CrawlQueue(args.queue) as queue:
+        if args.command == 'coordinator':
+            result = run_coordinator(queue, args.chart_url, args.archive_dir)
+        else:
+            run_id = args.run or queue.latest_run()
+            if run_id is None:
+                logging.error("No crawl runs published yet")
+                sys.exit(1)
+            if args.command == 'worker':
+                run_worker(queue, run_id, shard_size=args.shard_size, lease_seconds=args.lease_seconds,
+                           max_attempts=args.max_attempts, delay=tuple(args.delay), archive_dir=args.archive_dir)
+                result = True
+            else:
+                result = run_merge(queue, run_id, args.partial)
+    sys.exit(0 if result else 1)
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ import seaborn as sns
 from datetime import datetime
 import glob
 import os
+from similar_movies import find_similar_movies
+from resampling import correlation_intervals, pair_intervals, trend_line_band
 
 # Set style for better looking plots
 plt.style.use('seaborn-v0_8')
@@ -40,6 +42,10 @@ def generate_analysis_results(df):
     correlation_matrix = df[numeric_cols].corr().round(3)
     correlation_matrix.to_csv(f'results/correlation_matrix_{timestamp}.csv')
     
+    # Bootstrap confidence intervals and permutation p-values for every pair in the matrix
+    correlation_ci = correlation_intervals(df, numeric_cols)
+    correlation_ci.to_csv(f'results/correlation_intervals_{timestamp}.csv', index=False, float_format='%.6g')
+    
     # 3. Top 10 Lists
     # Top 10 highest rated movies
     top10_rated = df.nlargest(10, 'imdb_rating')[['title', 'imdb_rating', 'director', 'release_year']]
@@ -99,15 +105,27 @@ def generate_analysis_results(df):
         f.write(f"Most Awarded Movie: {top10_awards.iloc[0]['title']} ({top10_awards.iloc[0]['award_wins']} wins)\n")
         
         # Find interesting correlations
-        rating_budget_corr = df['imdb_rating'].corr(df['budget_million'])
-        rating_boxoffice_corr = df['imdb_rating'].corr(df['box_office_million'])
-        
-        f.write(f"\nInteresting Correlations:\n")
-        f.write(f"- Rating vs Budget: {rating_budget_corr:.3f}\n")
-        f.write(f"- Rating vs Box Office: {rating_boxoffice_corr:.3f}\n")
+        f.write(f"\nInteresting Correlations (95% bootstrap CI, permutation p-value):\n")
+        for label, column in [('Rating vs Budget', 'budget_million'), ('Rating vs Box Office', 'box_office_million')]:
+            row = correlation_ci[(correlation_ci['column_x'] == 'imdb_rating') & (correlation_ci['column_y'] == column)].iloc[0]
+            f.write(f"- {label}: {row['correlation']:.3f} "
+                    f"[{row['correlation_ci_low']:.3f}, {row['correlation_ci_high']:.3f}], "
+                    f"p = {row['permutation_p_value']:.4f}\n")
     
     print(f"Analytical results saved to /results folder with timestamp: {timestamp}")
 
+def generate_similar_movies(df, k=10):
+    """Save each movie's k most similar movies to results/ folder"""
+    print("Finding similar movies...")
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    
+    os.makedirs('results', exist_ok=True)
+    
+    similar = find_similar_movies(df, k)
+    similar.to_csv(f'results/similar_movies_{timestamp}.csv', index=False)
+    
+    print(f"Similar movies saved to /results folder with timestamp: {timestamp}")
+
 def generate_all_visualizations(df):
     """Generate and save all visualizations"""
     print("Generating visualizations...")
@@ -171,10 +189,11 @@ def generate_all_visualizations(df):
     plt.title('Do Higher Ratings Mean More Money?')
     plt.grid(True, alpha=0.3)
     
-    # Add trend line
-    z = np.polyfit(df['imdb_rating'], df['box_office_million'], 1)
-    p = np.poly1d(z)
-    plt.plot(df['imdb_rating'], p(df['imdb_rating']), "r--", alpha=0.8)
+    # Add trend line with its 95% bootstrap confidence band (movies without box office data are skipped)
+    rating_grid = np.linspace(df['imdb_rating'].min(), df['imdb_rating'].max(), 100)
+    trend, band_low, band_high = trend_line_band(df['imdb_rating'], df['box_office_million'], rating_grid)
+    plt.plot(rating_grid, trend, "r--", alpha=0.8)
+    plt.fill_between(rating_grid, band_low, band_high, color='red', alpha=0.15)
     plt.tight_layout()
     plt.savefig(f'images/rating_vs_boxoffice_{timestamp}.png', dpi=300, bbox_inches='tight')
     plt.close()
@@ -194,12 +213,13 @@ def generate_all_visualizations(df):
     plt.close()
     
     # Question 6: Votes vs Box Office
-    votes_corr = df['number_of_votes'].corr(df['box_office_million'])
+    votes_corr = pair_intervals(df['number_of_votes'], df['box_office_million'])
     plt.figure(figsize=(8, 5))
     plt.scatter(df['number_of_votes']/1000000, df['box_office_million'], alpha=0.5)
     plt.xlabel('Votes (Millions)')
     plt.ylabel('Box Office ($ Millions)')
-    plt.title(f'More Votes = More Money? (Correlation: {votes_corr:.2f})')
+    plt.title(f'More Votes = More Money? (Correlation: {votes_corr["correlation"]:.2f}, '
+              f'95% CI {votes_corr["correlation_ci_low"]:.2f} to {votes_corr["correlation_ci_high"]:.2f})')
     plt.grid(True, alpha=0.3)
     plt.savefig(f'images/votes_vs_boxoffice_{timestamp}.png', dpi=300, bbox_inches='tight')
     plt.close()
@@ -296,6 +316,9 @@ def main():
         # Generate analytical results
         generate_analysis_results(df)
         
+        # Generate similar movies table
+        generate_similar_movies(df)
+        
         print("Analysis completed successfully!")
         
     except Exception as e:
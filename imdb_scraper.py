@@ -17,20 +17,33 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 
 from config import URL, HEADERS
+from movie_record import MovieRecord, MovieDetails
 
-# --- YOUR ORIGINAL FUNCTIONS (NO CHANGES) ---
+# --- Fetching and extraction ---
 
-def top_250_movies_list(url, headers):
-    # Send request to the main page
+def fetch_page(url, headers, archive=None, role=None):
+    """Fetch a page and, if an archive is given, store the raw response bytes in it"""
     response = requests.get(url, headers=headers, timeout=10)
+    if archive is not None:
+        archive.write(url, response.status_code, response.content, response.headers.get('Content-Type'), role)
+    return response
+
+def top_250_movies_list(url, headers, archive=None):
+    # Send request to the main page
+    # Archived with role 'chart', so re-extraction finds the chart whatever its URL
+    response = fetch_page(url, headers, archive, role='chart')
 
     # Check if request was successful
     if response.status_code != 200:
         print(f"Failed to fetch page. Status code: {response.status_code}")
         return None  # Return None instead of exit()
 
+    return parse_movies_list(response.text)
+
+def parse_movies_list(html):
+    """Extract the basic movie list from the chart page HTML"""
     # Parse the HTML content
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(html, 'html.parser')
 
     # Find the script tag containing JSON-LD data
     script_tag = soup.find('script', type='application/ld+json')
@@ -61,27 +74,22 @@ def top_250_movies_list(url, headers):
         else:
             formatted_genre = genre_value
         
-        basic_data.append({
-            'title': item.get('name', None),
-            'id': item.get('url', '').removeprefix('https://www.imdb.com') if item.get('url') else None,
-            'imdb_rating': item.get('aggregateRating', {}).get('ratingValue', None),
-            'number_of_votes': item.get('aggregateRating', {}).get('ratingCount', None),
-            'genre': formatted_genre,  # Fixed this line
-            'run_time': item.get('duration', None),
-            'imdb_url': item.get('url', None),
-            'description': item.get('description', None)
-        })
+        basic_data.append(MovieRecord(
+            title=item.get('name', None),
+            id=item.get('url', '').removeprefix('https://www.imdb.com') if item.get('url') else None,
+            imdb_rating=item.get('aggregateRating', {}).get('ratingValue', None),
+            number_of_votes=item.get('aggregateRating', {}).get('ratingCount', None),
+            genre=formatted_genre,  # Fixed this line
+            run_time=item.get('duration', None),
+            imdb_url=item.get('url', None),
+            description=item.get('description', None)
+        ))
     
     return basic_data
 
-# Helper function for our get_all_movie_data function
-def get_movie_data_soup(movie_url):
+# Helper function for our extract_movie_data function
+def get_movie_data_soup(soup):
     try:
-        time.sleep(random.uniform(1, 3))
-        response = requests.get(movie_url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
         # Look for specific data-testid attributes (more reliable)
         financial_data = {}
         
@@ -124,38 +132,55 @@ def get_movie_data_soup(movie_url):
         )
         
     except Exception as e:
-        print(f"Error processing {movie_url}: {e}")
+        print(f"Error processing movie page: {e}")
         return None, None, None, None, None, None
 
-def get_all_movie_data(movie_url):
+def extract_movie_data(html):
+    """
+    Extract both JSON-LD and HTML data from a movie page.
+    Does no network access, so it can be re-run over archived pages.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Get JSON-LD data
+    json_data = None
+    script_tag = soup.find('script', type='application/ld+json')
+    if script_tag:
+        json_data = json.loads(script_tag.string)
+    
+    # Get HTML data
+    html_data = get_movie_data_soup(soup)
+    
+    # Combine results
+    if json_data:
+        director = json_data.get('director', [{}])[0].get('name', None)
+        top_actors = [actor['name'] for actor in json_data.get('actor', [])][:3]
+    else:
+        director, top_actors= None, []
+    
+    certs, meta, release, wins, budget, box_office = html_data
+    
+    return MovieDetails(
+        director=director,
+        top_actors=top_actors,
+        release_year=release,
+        certificate=certs,
+        metascore=meta,
+        wins_nominations=wins,
+        budget=budget,
+        box_office=box_office
+    )
+
+def get_all_movie_data(movie_url, archive=None):
     """
     Get both JSON-LD and HTML data in one function call
     """
     try:
         time.sleep(random.uniform(1, 3))
-        response = requests.get(movie_url, headers=HEADERS, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Get JSON-LD data
-        json_data = None
-        script_tag = soup.find('script', type='application/ld+json')
-        if script_tag:
-            json_data = json.loads(script_tag.string)
-        
-        # Get HTML data
-        html_data = get_movie_data_soup(movie_url)  # Modified version that takes soup
-        
-        # Combine results
-        if json_data:
-            director = json_data.get('director', [{}])[0].get('name', None)
-            top_actors = [actor['name'] for actor in json_data.get('actor', [])][:3]
-        else:
-            director, top_actors= None, []
-        
-        certs, meta, release, wins, budget, box_office = html_data
-        
-        return director, top_actors, certs, meta, release, wins, budget, box_office
+        response = fetch_page(movie_url, HEADERS, archive)
+        response.raise_for_status()
+        return extract_movie_data(response.text)
         
     except Exception as e:
         print(f"Error with {movie_url}: {e}")
-        return None, [], None, None, None, None, None, None
\ No newline at end of file
+        return MovieDetails()
\ No newline at end of file
@@ -0,0 +1,65 @@
+# movie_record.py
+# Compact, slotted record types for scraped movies.
+#
+# Slotted dataclasses store their fields in fixed slots instead of a per-instance
+# __dict__, so a record costs a fraction of the memory of the equivalent dict.
+from dataclasses import dataclass, field, fields
+import pandas as pd
+
+
+@dataclass(slots=True)
+class MovieDetails:
+    """Data extracted from a single movie page"""
+    director: str | None = None
+    top_actors: list = field(default_factory=list)
+    release_year: str | None = None
+    certificate: str | None = None
+    metascore: str | None = None
+    wins_nominations: str | None = None
+    budget: str | None = None
+    box_office: str | None = None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in DETAIL_FIELDS}
+
+
+@dataclass(slots=True)
+class MovieRecord:
+    """One movie from the Top 250 chart, plus its page details once fetched"""
+    # From the chart page JSON-LD
+    title: str | None = None
+    id: str | None = None
+    imdb_rating: float | None = None
+    number_of_votes: int | None = None
+    genre: str | None = None
+    run_time: str | None = None
+    imdb_url: str | None = None
+    description: str | None = None
+    # From the movie page
+    director: str | None = None
+    top_actors: list | None = None
+    release_year: str | None = None
+    certificate: str | None = None
+    metascore: str | None = None
+    wins_nominations: str | None = None
+    budget: str | None = None
+    box_office: str | None = None
+
+    def add_details(self, details):
+        """Copy the fields of a MovieDetails into this record"""
+        for name in DETAIL_FIELDS:
+            setattr(self, name, getattr(details, name))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in MOVIE_FIELDS}
+
+
+# Field names in output column order
+MOVIE_FIELDS = tuple(f.name for f in fields(MovieRecord))
+DETAIL_FIELDS = tuple(f.name for f in fields(MovieDetails))
+
+
+def records_to_dataframe(records):
+    """Build a DataFrame column by column straight from the records"""
+    columns = {name: [getattr(record, name) for record in records] for name in MOVIE_FIELDS}
+    return pd.DataFrame(columns, columns=list(MOVIE_FIELDS))
@@ -0,0 +1,167 @@
+# page_archive.py
+# Append-only, compressed archive of every page fetched during a scraper run.
+#
+# Each run writes two files to archive/:
+#   pages_<timestamp>.warc.gz    - one gzip member per fetched page (WARC-like records)
+#   pages_<timestamp>.idx.jsonl  - one JSON line per record: url, fetch time, status, byte offset, length,
+#                                  and the page's role if it has one (e.g. 'chart')
+#
+# A distributed crawl runs several processes per run; each writes its own part,
+# pages_<timestamp>.<part>.warc.gz, and the parts are read back together as one run.
+#
+# Pages are stored exactly as received (raw bytes plus their Content-Type header) and
+# only decoded when read back, so a charset-detection bug is never frozen into the archive.
+# Because every record is its own gzip member, a single page can be read back
+# by seeking to its offset without decompressing the rest of the archive.
+import gzip
+import json
+import os
+import glob
+import re
+import threading
+from datetime import datetime, timezone
+from bs4 import UnicodeDammit
+
+ARCHIVE_DIR = 'archive'
+
+
+class PageArchive:
+    """Thread-safe writer for one run's page archive"""
+
+    def __init__(self, timestamp, directory=ARCHIVE_DIR, part=None):
+        os.makedirs(directory, exist_ok=True)
+        name = f'pages_{timestamp}' if part is None else f'pages_{timestamp}.{archive_part(part)}'
+        self.path = os.path.join(directory, f'{name}.warc.gz')
+        self.index_path = os.path.join(directory, f'{name}.idx.jsonl')
+        self._lock = threading.Lock()
+        self._data_file = open(self.path, 'ab')
+        self._index_file = open(self.index_path, 'a', encoding='utf-8')
+
+    def write(self, url, status, content, content_type=None, role=None):
+        """Compress and append one fetched page (raw response bytes), then record it in the index"""
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        body = content
+        header = (
+            "WARC/1.1\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"WARC-Date: {fetched_at}\r\n"
+            f"HTTP-Status: {status}\r\n"
+            f"Content-Type: {content_type or ''}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        ).encode('utf-8')
+        record = gzip.compress(header + body + b"\r\n\r\n")
+        entry = {'url': url, 'fetched_at': fetched_at, 'status': status}
+        if role is not None:
+            entry['role'] = role
+
+        with self._lock:
+            offset = self._data_file.tell()
+            self._data_file.write(record)
+            self._data_file.flush()
+            self._index_file.write(json.dumps({**entry, 'offset': offset, 'length': len(record)}) + '\n')
+            self._index_file.flush()
+
+    def close(self):
+        with self._lock:
+            self._data_file.close()
+            self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def find_archives(directory=ARCHIVE_DIR):
+    """List all archived runs, oldest first"""
+    return sorted(glob.glob(os.path.join(directory, 'pages_*.warc.gz')))
+
+
+def index_path_for(archive_path):
+    """Return the index file that belongs to an archive file"""
+    return archive_path.removesuffix('.warc.gz') + '.idx.jsonl'
+
+
+def archive_part(name):
+    """Make a process name (e.g. a worker id) safe to use as an archive part"""
+    return re.sub(r'[^A-Za-z0-9-]+', '-', name)
+
+
+def archive_timestamp(archive_path):
+    """Extract the run timestamp from an archive file name (either a whole run or one part of it)"""
+    return os.path.basename(archive_path).removeprefix('pages_').removesuffix('.warc.gz').partition('.')[0]
+
+
+def group_runs(archive_paths):
+    """Group archive files by run, as a dict of timestamp -> list of files, oldest run first"""
+    runs = {}
+    for path in sorted(archive_paths):
+        runs.setdefault(archive_timestamp(path), []).append(path)
+    return runs
+
+
+def run_archives(archive_path):
+    """Return every archive file of the run that archive_path belongs to"""
+    directory = os.path.dirname(archive_path)
+    timestamp = archive_timestamp(archive_path)
+    return sorted(glob.glob(os.path.join(directory, f'pages_{timestamp}.warc.gz')) +
+                  glob.glob(os.path.join(directory, f'pages_{timestamp}.*.warc.gz')))
+
+
+def read_index(archive_path):
+    """Load the index of an archive as a dict of url -> latest record entry"""
+    index = {}
+    with open(index_path_for(archive_path), encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            # Later fetches of the same URL replace earlier ones
+            index[entry['url']] = entry
+    return index
+
+
+def read_run_index(archive_paths):
+    """
+    Merge the indexes of all files of one run. Each entry gains an 'archive' key
+    naming the file its record is in; the latest fetch of a URL across files wins.
+    """
+    index = {}
+    for archive_path in archive_paths:
+        for url, entry in read_index(archive_path).items():
+            # ISO timestamps in UTC compare correctly as strings
+            if url not in index or entry['fetched_at'] >= index[url]['fetched_at']:
+                index[url] = {**entry, 'archive': archive_path}
+    return index
+
+
+def _charset(content_type):
+    """Return the charset parameter of a Content-Type header, if any"""
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            return value.strip().strip('"\'') or None
+    return None
+
+
+def read_record(archive_path, offset, length):
+    """Read a single page from an archive, returning its decoded HTML"""
+    with open(archive_path, 'rb') as f:
+        f.seek(offset)
+        record = gzip.decompress(f.read(length))
+    header, body = record.split(b"\r\n\r\n", 1)
+    body = body.removesuffix(b"\r\n\r\n")
+
+    content_type = ''
+    for line in header.decode('utf-8').split('\r\n'):
+        name, _, value = line.partition(':')
+        if name.lower() == 'content-type':
+            content_type = value.strip()
+
+    # Trust the server's charset first, then fall back to the page's own declarations and sniffing
+    charset = _charset(content_type)
+    return UnicodeDammit(body, known_definite_encodings=[charset] if charset else []).unicode_markup
@@ -0,0 +1,90 @@
+# reextract.py
+# Re-run the extractors over archived pages with no network access.
+#
+#   python reextract.py                      # latest archived run
+#   python reextract.py archive/pages_20250914_1843.warc.gz
+#   python reextract.py --all                # every archived run
+#
+# A run archived in several parts (one per distributed crawl process) is re-extracted
+# as a whole; passing any one of its files selects the entire run.
+#
+# Regenerated snapshots go to data/reextract/ so they never shadow a fresh scrape.
+from imdb_scraper import parse_movies_list, extract_movie_data
+from page_archive import find_archives, group_runs, run_archives, read_run_index, read_record
+from run_scraper import combine_movie_data, save_results
+from movie_record import MovieDetails
+from config import URL
+import concurrent.futures
+import argparse
+import os
+import sys
+
+OUTPUT_DIR = os.path.join('data', 'reextract')
+
+def extract_archived_movie(entry):
+    """Worker function: read one archived movie page and extract its data"""
+    if entry is None or entry['status'] != 200:
+        return MovieDetails()
+    try:
+        html = read_record(entry['archive'], entry['offset'], entry['length'])
+        return extract_movie_data(html)
+    except Exception as e:
+        print(f"Error with archived {entry['url']}: {e}")
+        return MovieDetails()
+
+def chart_entry(index):
+    """Find the chart page of a run: the latest page archived with role 'chart'"""
+    charts = [entry for entry in index.values() if entry.get('role') == 'chart']
+    if charts:
+        return max(charts, key=lambda entry: entry['fetched_at'])
+    # Archives written before roles were recorded only have the chart under its usual URL
+    return index.get(URL)
+
+def reextract_run(timestamp, archive_paths, executor, output_dir=OUTPUT_DIR):
+    """Rebuild the scraped snapshot of one archived run from all of its archive files"""
+    index = read_run_index(archive_paths)
+
+    list_entry = chart_entry(index)
+    if list_entry is None or list_entry['status'] != 200:
+        print(f"Skipping run {timestamp}: chart page not archived")
+        return None
+
+    movies_list = parse_movies_list(read_record(list_entry['archive'], list_entry['offset'], list_entry['length']))
+    if not movies_list:
+        print(f"Skipping run {timestamp}: failed to extract movies data")
+        return None
+
+    entries = [index.get(movie.imdb_url) for movie in movies_list]
+    results = list(executor.map(extract_archived_movie, entries, chunksize=16))
+
+    combine_movie_data(movies_list, results)
+    json_path, csv_path = save_results(movies_list, timestamp, output_dir)
+    print(f"Re-extracted {len(movies_list)} movies from {len(archive_paths)} archive file(s) of run {timestamp} to {csv_path}")
+    return csv_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run extractors over archived IMDb pages")
+    parser.add_argument('archives', nargs='*', help="archive files to process (default: latest run)")
+    parser.add_argument('--all', action='store_true', help="process every archived run")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="where to write regenerated snapshots")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="number of extractor processes")
+    args = parser.parse_args()
+
+    if args.archives:
+        runs = group_runs({path for archive_path in args.archives for path in run_archives(archive_path)})
+    else:
+        runs = group_runs(find_archives())
+        if not args.all:
+            runs = dict(list(runs.items())[-1:])
+
+    if not runs:
+        print("No archived runs found in archive directory")
+        sys.exit(1)
+
+    # One process pool is shared by all runs so months of history parse across every core
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for timestamp, archive_paths in runs.items():
+            reextract_run(timestamp, archive_paths, executor, args.output_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# resampling.py
+# Bootstrap and permutation confidence intervals for correlations and trend lines.
+#
+# All resamples of a column pair are drawn as one (resamples x rows) index array
+# and evaluated with vectorised NumPy, instead of looping in Python. Column pairs
+# are spread across processes. Every pair gets its own child seed spawned from a
+# single base seed, so results are reproducible however the work is scheduled.
+import numpy as np
+import pandas as pd
+import concurrent.futures
+import itertools
+
+N_RESAMPLES = 10_000
+SEED = 42
+CONFIDENCE = 0.95
+
+# Upper bound on the number of values in one batch of resamples (bounds memory use)
+BATCH_ELEMENTS = 2 ** 22
+
+# Statistics returned by pair_intervals besides the sample size
+INTERVAL_KEYS = (
+    'correlation', 'correlation_ci_low', 'correlation_ci_high', 'permutation_p_value',
+    'slope', 'slope_ci_low', 'slope_ci_high', 'intercept', 'intercept_ci_low', 'intercept_ci_high',
+)
+
+def _seed_sequence(seed):
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+def _complete_pairs(x, y):
+    """Drop rows where either value is missing, like pandas' pairwise corr()"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    mask = ~(np.isnan(x) | np.isnan(y))
+    return x[mask], y[mask]
+
+def _fit_rows(xs, ys):
+    """Pearson r, slope and intercept of every row of two (resamples x rows) arrays"""
+    x_mean = xs.mean(axis=1, keepdims=True)
+    y_mean = ys.mean(axis=1, keepdims=True)
+    xd = xs - x_mean
+    yd = ys - y_mean
+    sxy = np.einsum('ij,ij->i', xd, yd)
+    sxx = np.einsum('ij,ij->i', xd, xd)
+    syy = np.einsum('ij,ij->i', yd, yd)
+    # Resamples where a column is constant have no defined correlation or slope
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = sxy / np.sqrt(sxx * syy)
+        slope = sxy / sxx
+    intercept = y_mean[:, 0] - slope * x_mean[:, 0]
+    return r, slope, intercept
+
+def _batches(n_resamples, n_rows):
+    batch = max(1, BATCH_ELEMENTS // max(n_rows, 1))
+    for start in range(0, n_resamples, batch):
+        yield min(batch, n_resamples - start)
+
+def bootstrap_fits(x, y, n_resamples=N_RESAMPLES, seed=SEED):
+    """Return arrays of (r, slope, intercept), one entry per bootstrap resample"""
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    results = []
+    for size in _batches(n_resamples, n):
+        idx = rng.integers(0, n, size=(size, n))
+        results.append(_fit_rows(x[idx], y[idx]))
+    return tuple(np.concatenate(parts) for parts in zip(*results))
+
+def permutation_correlations(x, y, n_resamples=N_RESAMPLES, seed=SEED):
+    """Return the Pearson r of x against each of n_resamples random permutations of y"""
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    # Permuting y leaves both means and variances unchanged, so each r is a single dot product
+    xd = x - x.mean()
+    yd = y - y.mean()
+    sum_squares = (xd @ xd) * (yd @ yd)
+    if sum_squares == 0:
+        # A constant column has no defined correlation under any permutation
+        return np.full(n_resamples, np.nan)
+    scale = 1 / np.sqrt(sum_squares)
+    results = []
+    for size in _batches(n_resamples, n):
+        idx = rng.permuted(np.broadcast_to(np.arange(n), (size, n)), axis=1)
+        results.append(yd[idx] @ xd * scale)
+    return np.concatenate(results)
+
+def _interval(values):
+    alpha = (1 - CONFIDENCE) / 2
+    return tuple(np.nanquantile(values, [alpha, 1 - alpha])) if np.isfinite(values).any() else (np.nan, np.nan)
+
+def pair_intervals(x, y, n_resamples=N_RESAMPLES, seed=SEED):
+    """Correlation and linear trend of y on x, with bootstrap CIs and a permutation p-value"""
+    x, y = _complete_pairs(x, y)
+    n = len(x)
+    # Every key is always present, so callers can index the result even for tiny samples
+    result = {'n': n, **dict.fromkeys(INTERVAL_KEYS, np.nan)}
+    if n < 3:
+        return result
+
+    boot_seed, perm_seed = _seed_sequence(seed).spawn(2)
+    r, slope, intercept = (value[0] for value in _fit_rows(x[None, :], y[None, :]))
+    boot_r, boot_slope, boot_intercept = bootstrap_fits(x, y, n_resamples, boot_seed)
+    perm_r = permutation_correlations(x, y, n_resamples, perm_seed)
+
+    result['correlation'] = r
+    result['correlation_ci_low'], result['correlation_ci_high'] = _interval(boot_r)
+    # Two-sided; the +1 counts the observed data as one of the permutations
+    if np.isfinite(r):
+        result['permutation_p_value'] = (1 + np.sum(np.abs(perm_r) >= abs(r))) / (n_resamples + 1)
+    result['slope'] = slope
+    result['slope_ci_low'], result['slope_ci_high'] = _interval(boot_slope)
+    result['intercept'] = intercept
+    result['intercept_ci_low'], result['intercept_ci_high'] = _interval(boot_intercept)
+    return result
+
+def _pair_worker(args):
+    col_x, col_y, x, y, n_resamples, seed = args
+    return {'column_x': col_x, 'column_y': col_y, **pair_intervals(x, y, n_resamples, seed)}
+
+def correlation_intervals(df, columns, n_resamples=N_RESAMPLES, seed=SEED, workers=None):
+    """
+    Bootstrap and permutation intervals for every pair of columns, computed in parallel.
+    Returns one row per pair, in the upper-triangle order of the correlation matrix.
+    """
+    pairs = list(itertools.combinations(columns, 2))
+    seeds = _seed_sequence(seed).spawn(len(pairs))
+    tasks = [
+        (col_x, col_y, df[col_x].to_numpy(dtype=np.float64), df[col_y].to_numpy(dtype=np.float64), n_resamples, pair_seed)
+        for (col_x, col_y), pair_seed in zip(pairs, seeds)
+    ]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        rows = list(executor.map(_pair_worker, tasks))
+    return pd.DataFrame(rows)
+
+def trend_line_band(x, y, grid, n_resamples=N_RESAMPLES, seed=SEED):
+    """
+    Least-squares trend line of y on x evaluated at grid, with a pointwise
+    bootstrap confidence band. Returns (line, band_low, band_high).
+    """
+    x, y = _complete_pairs(x, y)
+    grid = np.asarray(grid, dtype=np.float64)
+    if len(x) < 3:
+        empty = np.full(len(grid), np.nan)
+        return empty, empty, empty
+
+    _, slope, intercept = (value[0] for value in _fit_rows(x[None, :], y[None, :]))
+    _, boot_slope, boot_intercept = bootstrap_fits(x, y, n_resamples, seed)
+    valid = np.isfinite(boot_slope)
+    if not valid.any():
+        # x is constant in the data (and so in every resample): there is no trend line
+        empty = np.full(len(grid), np.nan)
+        return empty, empty, empty
+    lines = boot_intercept[valid, None] + boot_slope[valid, None] * grid[None, :]
+    alpha = (1 - CONFIDENCE) / 2
+    band_low, band_high = np.quantile(lines, [alpha, 1 - alpha], axis=0)
+    return intercept + slope * grid, band_low, band_high
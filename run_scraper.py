@@ -1,13 +1,37 @@
 # run_scraper.py
 from imdb_scraper import top_250_movies_list, get_all_movie_data
+from page_archive import PageArchive
+from movie_record import records_to_dataframe
 from config import URL, HEADERS
 import concurrent.futures
-import pandas as pd
+import functools
 import json
 import os
 import logging
 from datetime import datetime
 
+def combine_movie_data(movies_list, results):
+    """Merge the per-movie details into the basic movie records"""
+    for movie, details in zip(movies_list, results):
+        movie.add_details(details)
+    return movies_list
+
+def save_results(movies_list, timestamp, directory='data'):
+    """Save the combined movie data as JSON and CSV, returning both paths"""
+    os.makedirs(directory, exist_ok=True)
+    json_path = os.path.join(directory, f'imdb_top_250_{timestamp}.json')
+    csv_path = os.path.join(directory, f'imdb_top_250_{timestamp}.csv')
+
+    # Save as JSON
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump([movie.to_dict() for movie in movies_list], f, indent=4, ensure_ascii=False)
+    
+    # Save as CSV
+    df = records_to_dataframe(movies_list)
+    df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+    
+    return json_path, csv_path
+
 def main():
     print("Starting IMDb Top 250 Scraper")
     
@@ -27,64 +51,36 @@ def main():
     
     logging.info("Starting IMDb Top 250 Scraper")
 
-    # Step 1: Get basic movie list
-    movies_list = top_250_movies_list(URL, HEADERS)
-    
-    if movies_list:
-        logging.info(f"Successfully extracted {len(movies_list)} movies")
-    else:
-        logging.error("Failed to extract movies data")
-        return
-    
-    # Step 2: Get additional data for each movie
-    movie_urls = [movie.get('imdb_url') for movie in movies_list]
-    
-    directors = []
-    top_actors = []
-    release_years = []
-    certificates = []
-    metascores = []
-    budgets = []
-    box_offices = [] 
-    wins_nominations_list = []
+    # Every fetched page goes into a compressed archive so extraction can be re-run offline
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M')
+    with PageArchive(timestamp) as archive:
+        logging.info(f"Archiving raw pages to {archive.path}")
 
-    logging.info(f"Processing {len(movie_urls)} movies...")
-    
-    # Concurrent processing code
-    with concurrent.futures.ThreadPoolExecutor(max_workers=15) as executor:
-        results = list(executor.map(get_all_movie_data, movie_urls))
+        # Step 1: Get basic movie list
+        movies_list = top_250_movies_list(URL, HEADERS, archive)
+        
+        if movies_list:
+            logging.info(f"Successfully extracted {len(movies_list)} movies")
+        else:
+            logging.error("Failed to extract movies data")
+            return
+        
+        # Step 2: Get additional data for each movie
+        movie_urls = [movie.imdb_url for movie in movies_list]
+
+        logging.info(f"Processing {len(movie_urls)} movies...")
         
-    for director, actors, certs, meta, release, wins, budget, box_office in results:
-        directors.append(director)
-        top_actors.append(actors)
-        certificates.append(certs)
-        metascores.append(meta)
-        release_years.append(release)
-        wins_nominations_list.append(wins)
-        budgets.append(budget)
-        box_offices.append(box_office)
+        # Concurrent processing code
+        with concurrent.futures.ThreadPoolExecutor(max_workers=15) as executor:
+            results = list(executor.map(functools.partial(get_all_movie_data, archive=archive), movie_urls))
     
     # Step 3: Combine all data
-    for i, movie in enumerate(movies_list):
-        movie['director'] = directors[i] if i < len(directors) else None
-        movie['top_actors'] = top_actors[i] if i < len(top_actors) else None
-        movie['release_year'] = release_years[i] if i < len(release_years) else None
-        movie['certificate'] = certificates[i] if i < len(certificates) else None
-        movie['metascore'] = metascores[i] if i < len(metascores) else None
-        movie['wins_nominations'] = wins_nominations_list[i] if i < len(wins_nominations_list) else None
-        movie['budget'] = budgets[i] if i < len(budgets) else None
-        movie['box_office'] = box_offices[i] if i < len(box_offices) else None
+    combine_movie_data(movies_list, results)
     
     # Step 4: Save results
-    # Save as JSON
-    with open(f'data/imdb_top_250_{datetime.now().strftime('%Y%m%d_%H%M')}.json', 'w', encoding='utf-8') as f:
-        json.dump(movies_list, f, indent=4, ensure_ascii=False)
-    
-    # Save as CSV
-    df = pd.DataFrame(movies_list)
-    df.to_csv(f'data/imdb_top_250_{datetime.now().strftime('%Y%m%d_%H%M')}.csv', index=False, encoding='utf-8-sig')
+    json_path, csv_path = save_results(movies_list, timestamp)
     
-    logging.info(f"Data saved to data/imdb_top_250_{datetime.now().strftime('%Y%m%d_%H%M')}.json and data/imdb_top_250_{datetime.now().strftime('%Y%m%d_%H%M')}.csv")
+    logging.info(f"Data saved to {json_path} and {csv_path}")
     logging.info("Scraping completed successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,256 @@
+# search_index.py
+# Persistent inverted full-text index over titles, descriptions and people.
+#
+# The index is a directory of flat NumPy arrays, so opening it only memory-maps
+# the files and queries touch just the postings they need:
+#   terms.*        - sorted vocabulary (UTF-8 blob + offsets), binary-searched for prefix queries
+#   postings_*     - per-term document ids and term frequencies, sliced by postings_offsets
+#   doc_ids.*      - IMDb id of each document
+#   titles.*       - title of each document, for displaying results
+#   doc_lengths    - token count of each document, for BM25 length normalisation
+#   doc_hashes     - content hash of each document, for incremental rebuilds
+#   format_version - FORMAT_VERSION the index was built with
+#
+#   python search_index.py "dark knight"
+#   python search_index.py "nol" --prefix
+import numpy as np
+import pandas as pd
+import argparse
+import bisect
+import hashlib
+import os
+import re
+import shutil
+import unicodedata
+from collections import Counter
+
+INDEX_DIR = os.path.join('data', 'search_index')
+
+# Columns of the cleaned data that are searchable
+TEXT_COLUMNS = ['title', 'description', 'director', 'top_actors']
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Bump whenever tokenize() or the index layout changes: postings of an index built
+# with another version are never reused, so old and new tokens cannot be mixed
+FORMAT_VERSION = 1
+
+def tokenize(text):
+    """Lowercase, strip accents and split text into word tokens"""
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return TOKEN_PATTERN.findall(text)
+
+def document_text(row):
+    return ' '.join(str(row[col]) for col in TEXT_COLUMNS if pd.notna(row[col]))
+
+def document_hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+# --- Storage helpers ---
+
+def _load_array(path):
+    # Empty arrays cannot be memory-mapped
+    try:
+        # Plain ndarray view of the mapping: slicing np.memmap objects is much slower
+        return np.asarray(np.load(path, mmap_mode='r'))
+    except ValueError:
+        return np.load(path)
+
+def save_strings(directory, name, strings):
+    """Save a list of strings as one UTF-8 blob plus an offsets array"""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    np.save(os.path.join(directory, f'{name}.bytes.npy'), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+    np.save(os.path.join(directory, f'{name}.offsets.npy'), offsets)
+
+class StringTable:
+    """Read-only, memory-mapped list of strings saved by save_strings"""
+
+    def __init__(self, directory, name):
+        self._bytes = _load_array(os.path.join(directory, f'{name}.bytes.npy'))
+        self._offsets = _load_array(os.path.join(directory, f'{name}.offsets.npy'))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return self._bytes[self._offsets[i]:self._offsets[i + 1]].tobytes().decode('utf-8')
+
+    def to_list(self):
+        return [self[i] for i in range(len(self))]
+
+# --- Building ---
+
+def _read_postings(index, keep_docs, new_positions):
+    """
+    Recover (term, new doc position, tf) triples from an existing index
+    for the documents that are kept, without re-tokenizing them.
+    """
+    counts = np.diff(index.postings_offsets)
+    term_ids = np.repeat(np.arange(len(counts)), counts)
+    mask = keep_docs[index.postings_docs]
+    old_terms = index.terms.to_list()
+    return (
+        [old_terms[t] for t in term_ids[mask]],
+        new_positions[index.postings_docs[mask]],
+        np.asarray(index.postings_tf[mask])
+    )
+
+def build_index(df, directory=INDEX_DIR):
+    """
+    Build the search index for a cleaned DataFrame.
+    If an index already exists, only documents whose text changed are re-tokenized.
+    """
+    doc_ids = df['id'].astype(str).tolist()
+    titles = df['title'].fillna('').astype(str).tolist()
+    texts = [document_text(row) for _, row in df[TEXT_COLUMNS].iterrows()]
+    hashes = np.array([document_hash(text) for text in texts], dtype=np.uint64)
+    doc_lengths = np.zeros(len(doc_ids), dtype=np.int32)
+
+    terms, docs, tfs = [], [], []
+    reused = 0
+
+    previous = SearchIndex(directory) if os.path.exists(os.path.join(directory, 'doc_hashes.npy')) else None
+    if previous is not None and previous.format_version != FORMAT_VERSION:
+        previous = None
+    changed = np.ones(len(doc_ids), dtype=bool)
+    if previous is not None:
+        old_position = {doc_id: i for i, doc_id in enumerate(previous.doc_ids.to_list())}
+        # For each old document: its position in the new index, or -1 if it changed or was removed
+        new_positions = np.full(len(old_position), -1, dtype=np.int64)
+        for i, doc_id in enumerate(doc_ids):
+            j = old_position.get(doc_id)
+            if j is not None and previous.doc_hashes[j] == hashes[i]:
+                new_positions[j] = i
+                changed[i] = False
+                doc_lengths[i] = previous.doc_lengths[j]
+        keep_docs = new_positions >= 0
+        reused = int(keep_docs.sum())
+        if reused:
+            terms, docs, tfs = _read_postings(previous, keep_docs, new_positions)
+            terms, docs, tfs = list(terms), list(docs), list(tfs)
+        del previous
+
+    for i in np.flatnonzero(changed):
+        tokens = tokenize(texts[i])
+        doc_lengths[i] = len(tokens)
+        for term, tf in Counter(tokens).items():
+            terms.append(term)
+            docs.append(i)
+            tfs.append(tf)
+
+    # Sort postings by term, then document
+    vocabulary = sorted(set(terms))
+    term_to_id = {term: i for i, term in enumerate(vocabulary)}
+    term_ids = np.array([term_to_id[term] for term in terms], dtype=np.int64)
+    docs = np.array(docs, dtype=np.int32)
+    tfs = np.array(tfs, dtype=np.uint16)
+    order = np.lexsort((docs, term_ids))
+    postings_offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    postings_offsets[1:] = np.cumsum(np.bincount(term_ids, minlength=len(vocabulary)))
+
+    # Write to a temporary directory, then swap it in
+    tmp_dir = directory + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    save_strings(tmp_dir, 'terms', vocabulary)
+    save_strings(tmp_dir, 'doc_ids', doc_ids)
+    save_strings(tmp_dir, 'titles', titles)
+    np.save(os.path.join(tmp_dir, 'postings_offsets.npy'), postings_offsets)
+    np.save(os.path.join(tmp_dir, 'postings_docs.npy'), docs[order])
+    np.save(os.path.join(tmp_dir, 'postings_tf.npy'), tfs[order])
+    np.save(os.path.join(tmp_dir, 'doc_lengths.npy'), doc_lengths)
+    np.save(os.path.join(tmp_dir, 'doc_hashes.npy'), hashes)
+    np.save(os.path.join(tmp_dir, 'format_version.npy'), np.array([FORMAT_VERSION], dtype=np.int32))
+    # Move the old index aside before swapping, so a crash never leaves a half-deleted index behind
+    old_dir = directory + '.old'
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    print(f"Search index saved to {directory} ({len(doc_ids)} documents, "
+          f"{len(vocabulary)} terms, {reused} reused, {int(changed.sum())} re-tokenized)")
+    return directory
+
+# --- Querying ---
+
+class SearchIndex:
+    """Memory-mapped inverted index with BM25 ranking"""
+
+    def __init__(self, directory=INDEX_DIR):
+        self.terms = StringTable(directory, 'terms')
+        self.doc_ids = StringTable(directory, 'doc_ids')
+        self.titles = StringTable(directory, 'titles')
+        self.postings_offsets = _load_array(os.path.join(directory, 'postings_offsets.npy'))
+        self.postings_docs = _load_array(os.path.join(directory, 'postings_docs.npy'))
+        self.postings_tf = _load_array(os.path.join(directory, 'postings_tf.npy'))
+        self.doc_lengths = _load_array(os.path.join(directory, 'doc_lengths.npy'))
+        self.doc_hashes = _load_array(os.path.join(directory, 'doc_hashes.npy'))
+        # Indexes written before versioning have no format_version file
+        version_path = os.path.join(directory, 'format_version.npy')
+        self.format_version = int(np.load(version_path)[0]) if os.path.exists(version_path) else 0
+        self.avg_doc_length = float(self.doc_lengths.mean()) if len(self.doc_lengths) else 0.0
+        # Per-document BM25 length normalisation, computed once
+        self._norm = K1 * (1 - B + B * self.doc_lengths / max(self.avg_doc_length, 1e-9))
+
+    def term_range(self, token, prefix=False):
+        """Return the [start, end) range of vocabulary ids matching a token"""
+        start = bisect.bisect_left(self.terms, token)
+        if not prefix:
+            return start, start + 1 if start < len(self.terms) and self.terms[start] == token else start
+        # Every term starting with the prefix sorts before prefix + the highest code point
+        return start, bisect.bisect_left(self.terms, token + '\U0010ffff', lo=start)
+
+    def search(self, query, k=10, prefix=False):
+        """
+        Rank documents for a query with BM25.
+        With prefix=True the last query token also matches longer terms (e.g. 'nol' -> 'nolan').
+        Returns a list of (id, title, score) tuples.
+        """
+        n_docs = len(self.doc_lengths)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        tokens = tokenize(query)
+        for i, token in enumerate(tokens):
+            # Like type-ahead search, only the last (possibly incomplete) token is prefix-matched
+            start, end = self.term_range(token, prefix and i == len(tokens) - 1)
+            # A token counts once per document: take its best-scoring expansion
+            # rather than crediting 'the', 'them', 'their', ... separately
+            token_scores = np.zeros(n_docs, dtype=np.float32)
+            for term_id in range(start, end):
+                lo, hi = self.postings_offsets[term_id], self.postings_offsets[term_id + 1]
+                docs = self.postings_docs[lo:hi]
+                tf = self.postings_tf[lo:hi].astype(np.float32)
+                idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                # Each document appears once per term, so plain fancy indexing is safe
+                token_scores[docs] = np.maximum(token_scores[docs], idf * tf * (K1 + 1) / (tf + self._norm[docs]))
+            scores += token_scores
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k)[:k]]
+        matched = matched[np.argsort(-scores[matched])]
+        return [(self.doc_ids[i], self.titles[i], float(scores[i])) for i in matched]
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the IMDb Top 250 full-text index")
+    parser.add_argument('query', help="search terms")
+    parser.add_argument('--prefix', action='store_true', help="match terms by prefix")
+    parser.add_argument('-k', type=int, default=10, help="number of results")
+    args = parser.parse_args()
+
+    index = SearchIndex()
+    for doc_id, title, score in index.search(args.query, args.k, args.prefix):
+        print(f"{score:6.2f}  {title} ({doc_id})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+# similar_movies.py
+# "Similar movies" engine: for each title, the k most similar titles in the snapshot.
+#
+# Every title becomes one sparse feature row made of four L2-normalised blocks:
+#   description - TF-IDF over description tokens
+#   genre       - multi-hot genres
+#   people      - multi-hot director and top actors
+#   numeric     - imdb_rating, run_time_minutes and decade, soft-binned so that
+#                 nearby values share bins
+# Each block is scaled by the square root of its weight, so the dot product of two
+# rows is the weighted sum of the per-block cosine similarities (between 0 and 1).
+#
+# The high-dimensional description and people blocks are kept sparse; the small genre
+# and numeric blocks are stored densely so their products run through BLAS.
+# Neighbours are found block by block: only a bounded slab of the similarity
+# matrix is held in memory at a time, whatever the number of titles.
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import hashlib
+import os
+from search_index import tokenize
+
+CACHE_DIR = os.path.join('data', 'similar_cache')
+
+WEIGHTS = {
+    'description': 0.4,
+    'genre': 0.25,
+    'people': 0.2,
+    'numeric': 0.15
+}
+
+# Numeric features and how many soft bins each one uses (None = one bin per decade)
+NUMERIC_BINS = {
+    'imdb_rating': 10,
+    'run_time_minutes': 10,
+    'decade': None
+}
+
+# Upper bound on the number of similarity scores computed per block
+BLOCK_ELEMENTS = 2 ** 23
+
+# Description terms found in more than this fraction of titles (e.g. 'the', 'a') are
+# dropped: they barely move TF-IDF scores but make every pair of titles overlap
+MAX_DOC_FREQUENCY = 0.2
+
+# Once this fraction of titles has changed since the features were last fitted,
+# refit them and recompute everything
+REFIT_FRACTION = 0.1
+
+FEATURE_COLUMNS = ['description', 'genre', 'director', 'top_actors', 'imdb_rating', 'run_time_minutes', 'release_year']
+
+def _split_list(value):
+    if pd.isna(value) or value == '':
+        return []
+    return [part.strip() for part in str(value).split(',') if part.strip()]
+
+def _people(director, top_actors):
+    people = [f'director:{name}' for name in _split_list(director)]
+    people += [f'actor:{name}' for name in _split_list(top_actors)]
+    return people
+
+def _numeric_values(df):
+    values = pd.DataFrame({
+        'imdb_rating': pd.to_numeric(df['imdb_rating'], errors='coerce'),
+        'run_time_minutes': pd.to_numeric(df['run_time_minutes'], errors='coerce'),
+        'decade': (pd.to_numeric(df['release_year'], errors='coerce') // 10) * 10
+    })
+    return {name: values[name].to_numpy(dtype=np.float64) for name in NUMERIC_BINS}
+
+def row_hashes(df):
+    """Hash the feature inputs of every title, to detect which ones changed"""
+    hashes = []
+    for row in df[FEATURE_COLUMNS].itertuples(index=False):
+        text = '\x1f'.join('' if pd.isna(value) else str(value) for value in row)
+        hashes.append(int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little'))
+    return np.array(hashes, dtype=np.uint64)
+
+# --- Features ---
+
+def feature_inputs(df):
+    """Tokenize and split the raw columns once, for fit_features and transform_features"""
+    return {
+        'tokens': [tokenize(text) for text in df['description'].fillna('').astype(str)],
+        'genres': [_split_list(value) for value in df['genre']],
+        'people': [_people(director, actors) for director, actors in zip(df['director'], df['top_actors'])],
+        'numeric': _numeric_values(df)
+    }
+
+def fit_features(inputs):
+    """Learn vocabularies, IDF weights and bin centres from a snapshot"""
+    tokens = inputs['tokens']
+    vocabulary = np.array(sorted({token for doc in tokens for token in doc}), dtype=str)
+    counts = _one_hot_matrix(tokens, vocabulary)
+    doc_freq = np.bincount(counts.indices, minlength=len(vocabulary))
+    n_docs = len(tokens)
+
+    # Terms found in a single title can never make two titles similar
+    keep = (doc_freq > 1) & (doc_freq <= MAX_DOC_FREQUENCY * n_docs)
+    vocabulary, doc_freq = vocabulary[keep], doc_freq[keep]
+
+    model = {
+        'vocabulary': vocabulary,
+        'idf': np.log((1 + n_docs) / (1 + doc_freq)) + 1,
+        'genres': np.array(sorted({g for genres in inputs['genres'] for g in genres}), dtype=str),
+        'people': np.array(sorted({p for people in inputs['people'] for p in people}), dtype=str)
+    }
+
+    for name, values in inputs['numeric'].items():
+        valid = values[~np.isnan(values)]
+        if len(valid) == 0:
+            centers = np.zeros(1)
+        elif valid.min() == valid.max():
+            # A constant column (or a single title) needs just one bin
+            centers = valid[:1]
+        elif NUMERIC_BINS[name] is None:
+            centers = np.arange(valid.min(), valid.max() + 10, 10)
+        else:
+            centers = np.linspace(valid.min(), valid.max(), NUMERIC_BINS[name])
+        model[f'centers_{name}'] = centers
+
+    return model
+
+def _one_hot_matrix(lists, vocabulary):
+    """Sparse count matrix with one row per list; items missing from the vocabulary are dropped"""
+    rows, cols = [], []
+    lookup = {item: i for i, item in enumerate(vocabulary)}
+    for i, items in enumerate(lists):
+        for item in items:
+            j = lookup.get(item)
+            if j is not None:
+                rows.append(i)
+                cols.append(j)
+    data = np.ones(len(rows), dtype=np.float32)
+    return sp.csr_matrix((data, (rows, cols)), shape=(len(lists), len(vocabulary)), dtype=np.float32)
+
+def _soft_bins(values, centers):
+    """Spread each value over its two nearest bin centres (linear interpolation)"""
+    n_bins = len(centers)
+    valid = np.flatnonzero(~np.isnan(values))
+    spacing = centers[1] - centers[0] if n_bins > 1 and centers[1] > centers[0] else 1.0
+    position = np.clip((values[valid] - centers[0]) / spacing, 0, n_bins - 1)
+    lower = np.minimum(np.floor(position).astype(np.int64), n_bins - 1)
+    upper = np.minimum(lower + 1, n_bins - 1)
+    frac = position - lower
+    rows = np.concatenate([valid, valid])
+    cols = np.concatenate([lower, upper])
+    data = np.concatenate([1 - frac, frac]).astype(np.float32)
+    return sp.csr_matrix((data, (rows, cols)), shape=(len(values), n_bins), dtype=np.float32)
+
+def _normalize_rows(matrix):
+    matrix = sp.csr_matrix(matrix, dtype=np.float32)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    scale = np.divide(1, norms, out=np.zeros_like(norms), where=norms > 0)
+    return sp.diags(scale.astype(np.float32)) @ matrix
+
+def transform_features(inputs, model):
+    """
+    Build the weighted, normalised features for a snapshot.
+    Returns (sparse description + people matrix, dense genre + numeric array).
+    """
+    tfidf = _one_hot_matrix(inputs['tokens'], model['vocabulary']) @ sp.diags(model['idf'].astype(np.float32))
+    genres = _one_hot_matrix(inputs['genres'], model['genres'])
+    people = _one_hot_matrix(inputs['people'], model['people'])
+
+    # Each numeric feature is normalised on its own, then the block is averaged over features
+    numeric = sp.hstack([
+        _normalize_rows(_soft_bins(values, model[f'centers_{name}']))
+        for name, values in inputs['numeric'].items()
+    ]) * np.float32(1 / np.sqrt(len(NUMERIC_BINS)))
+
+    blocks = {
+        'description': _normalize_rows(tfidf),
+        'genre': _normalize_rows(genres),
+        'people': _normalize_rows(people),
+        'numeric': numeric
+    }
+    weighted = {name: blocks[name] * np.float32(np.sqrt(weight)) for name, weight in WEIGHTS.items()}
+    sparse = sp.hstack([weighted['description'], weighted['people']], format='csr', dtype=np.float32)
+    dense = sp.hstack([weighted['genre'], weighted['numeric']]).toarray().astype(np.float32)
+    return sparse, dense
+
+# --- Neighbour search ---
+
+def blocked_top_k(features, rows, cols, k):
+    """
+    For each of `rows`, find the k most similar of `cols` (excluding itself).
+    Returns (neighbour indices, scores), padded with -1 / -inf where fewer than k exist.
+    """
+    neighbours = np.full((len(rows), k), -1, dtype=np.int64)
+    scores = np.full((len(rows), k), -np.inf, dtype=np.float32)
+    if len(rows) == 0 or len(cols) == 0 or k == 0:
+        return neighbours, scores
+
+    sparse, dense = features
+    sparse_cols_t = sparse[cols].T.tocsr()
+    dense_cols_t = np.ascontiguousarray(dense[cols].T)
+    col_position = np.full(sparse.shape[0], -1, dtype=np.int64)
+    col_position[cols] = np.arange(len(cols))
+    kk = min(k, len(cols))
+    block_rows = max(1, BLOCK_ELEMENTS // len(cols))
+
+    for start in range(0, len(rows), block_rows):
+        block = rows[start:start + block_rows]
+        similarity = dense[block] @ dense_cols_t
+        similarity += (sparse[block] @ sparse_cols_t).toarray()
+        # A title is never its own neighbour
+        own = col_position[block]
+        has_own = np.flatnonzero(own >= 0)
+        similarity[has_own, own[has_own]] = -np.inf
+
+        top = np.argpartition(similarity, -kk, axis=1)[:, -kk:]
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        neighbours[start:start + len(block), :kk] = cols[np.take_along_axis(top, order, axis=1)]
+        scores[start:start + len(block), :kk] = np.take_along_axis(top_scores, order, axis=1)
+
+    neighbours[~np.isfinite(scores)] = -1
+    return neighbours, scores
+
+def _merge_top_k(neighbours_a, scores_a, neighbours_b, scores_b, k):
+    neighbours = np.hstack([neighbours_a, neighbours_b])
+    scores = np.hstack([scores_a, scores_b])
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+    return np.take_along_axis(neighbours, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+# --- Cache ---
+
+def _out_of_vocabulary(inputs, rows, model):
+    """Whether any of the given titles has a genre or person the model was not fitted on"""
+    genres = set(model['genres'])
+    people = set(model['people'])
+    return any(
+        any(genre not in genres for genre in inputs['genres'][i]) or
+        any(person not in people for person in inputs['people'][i])
+        for i in rows
+    )
+
+def _fit_drift(doc_ids, hashes, fit_ids, fit_hashes):
+    """Number of titles added, changed or removed since the model was fitted"""
+    fitted = dict(zip(fit_ids, fit_hashes))
+    changed = sum(fitted.get(doc_id) != doc_hash for doc_id, doc_hash in zip(doc_ids, hashes))
+    removed = len(fitted.keys() - set(doc_ids))
+    return changed + removed
+
+def _save_cache(cache_dir, model, fit_ids, fit_hashes, doc_ids, hashes, neighbours, scores):
+    os.makedirs(cache_dir, exist_ok=True)
+    # The titles the model was fitted on, to measure drift on later snapshots
+    np.savez_compressed(os.path.join(cache_dir, 'model.npz'), **model,
+                        fit_ids=np.array(fit_ids, dtype=str), fit_hashes=fit_hashes)
+    np.savez_compressed(os.path.join(cache_dir, 'neighbours.npz'),
+                        doc_ids=np.array(doc_ids, dtype=str), hashes=hashes,
+                        neighbours=neighbours, scores=scores)
+
+def _load_cache(cache_dir):
+    model_path = os.path.join(cache_dir, 'model.npz')
+    neighbours_path = os.path.join(cache_dir, 'neighbours.npz')
+    if not (os.path.exists(model_path) and os.path.exists(neighbours_path)):
+        return None
+    with np.load(model_path) as model_file, np.load(neighbours_path) as neighbours_file:
+        model = {name: model_file[name] for name in model_file.files}
+        cache = {name: neighbours_file[name] for name in neighbours_file.files}
+    # Caches written before drift tracking are refitted
+    if 'fit_ids' not in model:
+        return None
+    cache['fit_ids'] = model.pop('fit_ids')
+    cache['fit_hashes'] = model.pop('fit_hashes')
+    cache['model'] = model
+    return cache
+
+def compute_neighbours(df, k=10, cache_dir=CACHE_DIR):
+    """
+    Return (neighbours, scores): for every row of df, the row positions and
+    similarity scores of its k most similar titles.
+
+    The result is cached. On the next snapshot, if only a few titles changed,
+    the cached model (vocabulary, IDF weights, bins) is reused and only the
+    affected neighbour lists are recomputed. Scores then differ slightly from a
+    fresh fit, so the model is refitted once REFIT_FRACTION of the titles has
+    changed since it was fitted, or when a changed title brings in a genre or
+    person the model does not know.
+    """
+    doc_ids = df['id'].astype(str).tolist()
+    hashes = row_hashes(df)
+    n = len(doc_ids)
+    everything = np.arange(n)
+
+    cache = _load_cache(cache_dir)
+    unchanged = np.zeros(n, dtype=bool)
+    old_to_new = None
+    if cache is not None and cache['neighbours'].shape[1] == k:
+        old_position = {doc_id: i for i, doc_id in enumerate(cache['doc_ids'])}
+        old_to_new = np.full(len(old_position), -1, dtype=np.int64)
+        for i, doc_id in enumerate(doc_ids):
+            j = old_position.get(doc_id)
+            if j is not None and cache['hashes'][j] == hashes[i]:
+                unchanged[i] = True
+                old_to_new[j] = i
+
+    dirty = np.flatnonzero(~unchanged)
+    inputs = feature_inputs(df)
+    refit = (
+        old_to_new is None or
+        _fit_drift(doc_ids, hashes, cache['fit_ids'], cache['fit_hashes']) > REFIT_FRACTION * n or
+        _out_of_vocabulary(inputs, dirty, cache['model'])
+    )
+    if refit:
+        model = fit_features(inputs)
+        fit_ids, fit_hashes = doc_ids, hashes
+        features = transform_features(inputs, model)
+        neighbours, scores = blocked_top_k(features, everything, everything, k)
+        print(f"Computed similar movies for all {n} titles")
+    else:
+        model = cache['model']
+        fit_ids, fit_hashes = cache['fit_ids'], cache['fit_hashes']
+        features = transform_features(inputs, model)
+        neighbours = np.full((n, k), -1, dtype=np.int64)
+        scores = np.full((n, k), -np.inf, dtype=np.float32)
+
+        # Cached neighbour lists of unchanged titles, renumbered to the new row order
+        new_rows = np.flatnonzero(unchanged)
+        new_to_old = np.full(n, -1, dtype=np.int64)
+        kept = np.flatnonzero(old_to_new >= 0)
+        new_to_old[old_to_new[kept]] = kept
+        old_rows = new_to_old[new_rows]
+        old_neighbours = cache['neighbours'][old_rows]
+        cached_neighbours = np.where(old_neighbours >= 0, old_to_new[np.maximum(old_neighbours, 0)], -1)
+        cached_scores = cache['scores'][old_rows]
+
+        # A list that contained a changed or removed title is stale and recomputed from scratch
+        stale = np.any((old_neighbours >= 0) & (cached_neighbours < 0), axis=1)
+        recompute = np.concatenate([dirty, new_rows[stale]])
+        neighbours[recompute], scores[recompute] = blocked_top_k(features, recompute, everything, k)
+
+        # Other lists only need checking against the changed titles
+        fresh = new_rows[~stale]
+        dirty_neighbours, dirty_scores = blocked_top_k(features, fresh, dirty, k)
+        neighbours[fresh], scores[fresh] = _merge_top_k(
+            cached_neighbours[~stale], cached_scores[~stale], dirty_neighbours, dirty_scores, k)
+        print(f"Updated similar movies: {len(recompute)} of {n} titles recomputed, "
+              f"{len(fresh)} merged with {len(dirty)} changed titles")
+
+    _save_cache(cache_dir, model, fit_ids, fit_hashes, doc_ids, hashes, neighbours, scores)
+    return neighbours, scores
+
+def find_similar_movies(df, k=10, cache_dir=CACHE_DIR):
+    """Return a long-format DataFrame of each title's k most similar titles"""
+    df = df.reset_index(drop=True)
+    neighbours, scores = compute_neighbours(df, k, cache_dir)
+    rows, ranks = np.nonzero(neighbours >= 0)
+    matches = neighbours[rows, ranks]
+    return pd.DataFrame({
+        'title': df['title'].to_numpy()[rows],
+        'id': df['id'].to_numpy()[rows],
+        'rank': ranks + 1,
+        'similar_title': df['title'].to_numpy()[matches],
+        'similar_id': df['id'].to_numpy()[matches],
+        'similarity': np.round(scores[rows, ranks], 4)
+    })
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import similar_movies
+from similar_movies import find_similar_movies, compute_neighbours, fit_features, feature_inputs, row_hashes, _load_cache
+
+
+def make_movies(n):
+    return pd.DataFrame({
+        'id': [f'/title/tt{i:07d}/' for i in range(n)],
+        'title': [f'Movie {i}' for i in range(n)],
+        'description': [f'a story about crime family number {i % 3} and revenge' for i in range(n)],
+        'genre': ['Crime, Drama' if i % 2 else 'Drama' for i in range(n)],
+        'director': [f'Director {i % 4}' for i in range(n)],
+        'top_actors': [f'Actor {i % 5}, Actor {(i + 1) % 5}' for i in range(n)],
+        'imdb_rating': [8.0 + (i % 10) / 10 for i in range(n)],
+        'run_time_minutes': [90 + 5 * (i % 12) for i in range(n)],
+        'release_year': [1950 + 3 * i for i in range(n)]
+    })
+
+
+def test_constant_numeric_column(tmp_path):
+    df = make_movies(5)
+    df['imdb_rating'] = 8.5
+    df['run_time_minutes'] = 120
+    df['release_year'] = 1994
+    similar = find_similar_movies(df, k=3, cache_dir=tmp_path)
+    assert len(similar) == 5 * 3
+    assert similar['similarity'].between(0, 1).all()
+
+
+def test_single_title(tmp_path):
+    similar = find_similar_movies(make_movies(1), k=3, cache_dir=tmp_path)
+    assert similar.empty
+
+
+def test_new_person_triggers_refit(tmp_path):
+    df = make_movies(50)
+    compute_neighbours(df, k=5, cache_dir=tmp_path)
+    df.loc[3, 'director'] = 'Brand New Person'
+    compute_neighbours(df, k=5, cache_dir=tmp_path)
+    assert 'director:Brand New Person' in set(_load_cache(tmp_path)['model']['people'])
+
+
+def test_small_updates_refit_once_drift_adds_up(tmp_path, monkeypatch):
+    monkeypatch.setattr(similar_movies, 'REFIT_FRACTION', 0.1)
+    df = make_movies(50)
+    compute_neighbours(df, k=5, cache_dir=tmp_path)
+    fitted_hashes = row_hashes(df)
+
+    # Weekly updates of two titles each: the first two stay below 10% drift since the fit...
+    for week in range(3):
+        for i in (2 * week, 2 * week + 1):
+            df.loc[i, 'description'] = f'an updated story number {week} about crime'
+        compute_neighbours(df, k=5, cache_dir=tmp_path)
+        if week < 2:
+            np.testing.assert_array_equal(_load_cache(tmp_path)['fit_hashes'], fitted_hashes)
+
+    # ...but the third brings it to 6 of 50 titles, so the model is refitted on the current snapshot
+    cache = _load_cache(tmp_path)
+    np.testing.assert_array_equal(cache['fit_hashes'], row_hashes(df))
+    expected = fit_features(feature_inputs(df))
+    np.testing.assert_array_equal(cache['model']['vocabulary'], expected['vocabulary'])
+    np.testing.assert_allclose(cache['model']['idf'], expected['idf'])